@@ -16,8 +16,10 @@
 #
 # ##### END GPL LICENSE BLOCK #####
 
-import ast
-import traceback
+import operator
+import re
+from keyword import iskeyword
+from functools import lru_cache
 
 import bpy
 from bpy.props import StringProperty, BoolProperty, IntProperty, FloatProperty, FloatVectorProperty
@@ -29,8 +31,14 @@ from sverchok.node_tree import SverchCustomTreeNode
 from sverchok.data_structure import Matrix_generate, updateNode, node_id
 
 
-def is_probably_color(item):
+def is_probably_color(item, path=None):
+    '''
+    path is the parsed path to item if known, its last attribute gives the property
+    name without building the full rna path via path_from_id
+    '''
     if isinstance(item, bpy_prop_array):
+        if path and path[-1][0] == "attr":
+            return True if path[-1][1].endswith('color') else None
         if hasattr(item, "path_from_id") and item.path_from_id().endswith('color'):
             return True
 
@@ -44,62 +52,160 @@ def parse_to_path(p):
     attr - attribute to get using getattr(obj,attr)
     key - key for accesing via obj[key]
     '''
+    import ast
+
+    path = []
+    while not isinstance(p, ast.Name):
+        if isinstance(p, ast.Attribute):
+            path.append(("attr", p.attr))
+        elif isinstance(p, ast.Subscript):
+            key = p.slice
+            if not isinstance(key, (ast.Num, ast.Str)):
+                # python < 3.9 wraps the key in an ast.Index
+                key = getattr(key, "value", None)
+            if isinstance(key, ast.Num):
+                path.append(("key", key.n))
+            elif isinstance(key, ast.Str):
+                path.append(("key", key.s))
+            else:
+                raise NameError
+        else:
+            raise NameError
+        p = p.value
 
-    if isinstance(p, ast.Attribute):
-        return parse_to_path(p.value)+[("attr", p.attr)] 
-    elif isinstance(p, ast.Subscript):
-        if isinstance(p.slice.value, ast.Num):
-            return  parse_to_path(p.value) + [("key", p.slice.value.n)]
-        elif isinstance(p.slice.value, ast.Str):
-            return parse_to_path(p.value) + [("key", p.slice.value.s)]
-    elif isinstance(p, ast.Name):
-        return [("name", p.id)]
-    else:
-        raise NameError
+    path.append(("name", p.id))
+    path.reverse()
+    return path
+
+# names a path can start with, apply_alias makes sure it is bpy
+path_roots = {"bpy": bpy}
+
+path_name = re.compile(r"[A-Za-z_]\w*")
+path_token = re.compile(r"""\.([A-Za-z_]\w*)|\[(0|[1-9]\d*)\]|\["([^"\\]*)"\]|\['([^'\\]*)'\]""")
+
+def is_plain_name(name):
+    # ast would normalize (NFKC) non ascii identifiers, leave those to the real parser
+    return name.isascii() and name.isidentifier() and not iskeyword(name)
+
+def tokenize_path(eval_str):
+    '''
+    - scan the common shape of a property path directly, without ast
+    - accepts a name followed by attributes, int keys and plain string keys
+    - gives the same path as parse_to_path, or None if the string has anything
+      else in it (whitespace, escapes, keywords, non ascii names, expressions..) and
+      needs the real parser
+    '''
+    if "[" not in eval_str:
+        # attributes only, the most common shape
+        names = eval_str.split(".")
+        if all(is_plain_name(name) for name in names):
+            return [("name", names[0])] + [("attr", name) for name in names[1:]]
+        return None
+
+    m = path_name.match(eval_str)
+    if not m:
+        return None
+
+    if not is_plain_name(m.group()):
+        return None
 
-def get_object(path):
+    path = [("name", m.group())]
+    pos, end = m.end(), len(eval_str)
+    while pos < end:
+        m = path_token.match(eval_str, pos)
+        if not m:
+            return None
+        group = m.lastindex
+        if group == 1:
+            if not is_plain_name(m.group(1)):
+                return None
+            path.append(("attr", m.group(1)))
+        elif group == 2:
+            path.append(("key", int(m.group(2))))
+        else:
+            path.append(("key", m.group(group)))
+        pos = m.end()
+    return path
+
+def path_to_expr(path):
     '''
-    - access the object specified from a path generated by parse_to_path
-    - this will fail if path is invalid
+    - the inverse of parse_to_path, rebuild a python expression from a path
+    - keys are written with repr so only literals end up in the expression
     '''
-    curr_object = globals()[path[0][1]]
+    expr = path[0][1]
     for t, value in path[1:]:
         if t == "attr":
-            curr_object = getattr(curr_object, value)
+            expr += "." + value
         elif t == "key":
-            curr_object = curr_object[value]
-    return curr_object
+            expr += "[" + repr(value) + "]"
+    return expr
+
+@lru_cache(maxsize=256)
+def compile_path(path):
+    '''
+    - compile a path generated by parse_to_path into a getter function
+    - calling the getter resolves the whole path without walking and dispatching
+      on the path ops every time
+    - path has to be a tuple, getters of recently used paths are shared between nodes
+    '''
+    root = path[0][1]
+    code = compile("lambda: " + path_to_expr(path), "<sv prop path>", "eval")
+    return eval(code, {root: path_roots[root]})
 
 def apply_alias(eval_str):
     '''
     - apply standard aliases
     - will raise error if it isn't an bpy path
     '''
-    if not eval_str.startswith("bpy."):
-        for alias, expanded in aliases.items():
-            if eval_str.startswith(alias):
-                eval_str = eval_str.replace(alias, expanded, 1)
-                break
-        if not eval_str.startswith("bpy."):
-            raise NameError
-    return eval_str
+    if eval_str.startswith("bpy."):
+        return eval_str
+    m = alias_pattern.match(eval_str)
+    if not m:
+        raise NameError
+    return aliases[m.group(1)] + eval_str[m.end():]
+
+def wrap_euler_quaternion(tvar):
+    tvar = tvar.to_matrix().to_4x4()
+    return [[r[:] for r in tvar[:]]]
+
+wrap_handlers = {
+    Vector: lambda tvar: [[tvar[:]]],
+    Color: lambda tvar: [[Color(tvar)]],
+    Matrix: lambda tvar: [[Matrix(tvar)]],
+    Euler: wrap_euler_quaternion,
+    Quaternion: wrap_euler_quaternion,
+    list: lambda tvar: [tvar],
+    int: lambda tvar: [[tvar]],
+    float: lambda tvar: [[tvar]]
+}
 
-def wrap_output_data(tvar):
+def wrap_output_data(tvar, is_color=None):
     '''
     create valid sverchok socket data from an object
+    is_color can be passed if it is already known whether tvar is a color array
+    '''
+    handler = wrap_handlers.get(type(tvar))
+    if handler:
+        return handler(tvar)
+    return wrap_fallback(tvar, is_color)
+
+def wrap_fallback(tvar, is_color=None):
     '''
+    slower path of wrap_output_data, for subclasses and bpy_prop_array
+    '''
+    if is_color is None:
+        is_color = is_probably_color(tvar)
     if isinstance(tvar, Vector):
         data = [[tvar[:]]]
     elif isinstance(tvar, Color):
         data = [[Color(tvar)]]
-    elif is_probably_color(tvar):
+    elif is_color:
         # mathutils.Color is a 3 component object only. never 4. (2020-January)
         data = [[Color(tvar[:3])]]
     elif isinstance(tvar, Matrix):
         data = [[Matrix(tvar)]]
     elif isinstance(tvar, (Euler, Quaternion)):
-        tvar = tvar.to_matrix().to_4x4()
-        data = [[r[:] for r in tvar[:]]]
+        data = wrap_euler_quaternion(tvar)
     elif isinstance(tvar, list):
         data = [tvar]
     elif isinstance(tvar, (int, float)):
@@ -108,26 +214,68 @@ def wrap_output_data(tvar):
         data = tvar
     return data
 
+def assign_scalar(obj, data):
+    # python scalars can't be changed in place, make_setter sets them on the parent
+    pass
+
+def assign_slice(obj, data):
+    obj[:] = data[0][0]
+
+def assign_matrix(obj, data):
+    obj[:] = data[0]
+
+def as_matrix(mat):
+    # upstream can give a Matrix or plain rows, only the latter needs a new Matrix
+    return mat if isinstance(mat, Matrix) else Matrix(mat)
+
+def assign_euler(obj, data):
+    obj[:] = as_matrix(data[0]).to_euler(obj.order)
+
+def assign_quaternion(obj, data):
+    obj[:] = as_matrix(data[0]).to_quaternion()
+
+assign_handlers = {
+    int: assign_scalar,
+    float: assign_scalar,
+    Vector: assign_slice,
+    Color: assign_slice,
+    Matrix: assign_matrix,
+    Euler: assign_euler,
+    Quaternion: assign_quaternion
+}
+
 def assign_data(obj, data):
     '''
     assigns data to the object
     '''
-    if isinstance(obj, (int, float)):
-        obj = data[0][0]
-    elif isinstance(obj, (Vector, Color)):
-        obj[:] = data[0][0] 
-    elif isinstance(obj, (Matrix, Euler, Quaternion)):
-        mat = data[0]
-        if isinstance(obj, Euler):
-            eul = mat.to_euler(obj.order)
-            obj[:] = eul
-        elif isinstance(obj, Quaternion):
-            quat = mat.to_quaternion()
-            obj[:] = quat 
-        else: #isinstance(obj, Matrix)
-            obj[:] = mat
-    else: # super optimistic guess
-        obj[:] = type(obj)(data[0][0])
+    handler = assign_handlers.get(type(obj))
+    if handler:
+        handler(obj, data)
+        return
+
+    # subclasses
+    for kind, handler in assign_handlers.items():
+        if isinstance(obj, kind):
+            handler(obj, data)
+            return
+
+    # super optimistic guess
+    obj[:] = type(obj)(data[0][0])
+
+def make_setter(path, obj):
+    '''
+    - specialize the assignment of data to the property at path, obj is its current value
+    - scalars and arrays are set on the parent using the last op of the path, the parent
+      itself is looked up at call time because blender structs can't be held on to safely
+    '''
+    if isinstance(obj, (int, float, bpy_prop_array)):
+        get_parent = compile_path(path[:-1])
+        p_type, value = path[-1]
+        set_value = setattr if p_type == "attr" else operator.setitem
+        return lambda data: set_value(get_parent(), value, data[0][0])
+
+    getter = compile_path(path)
+    return lambda data: assign_data(getter(), data)
 
 
 aliases = {
@@ -143,6 +291,10 @@ aliases = {
     "texts": "bpy.data.texts"
 }
 
+# the leading alias of a path, it has to be followed by an attribute or key
+alias_pattern = re.compile(
+    "^(" + "|".join(map(re.escape, sorted(aliases, key=len, reverse=True))) + r")(?=[.\[]|$)")
+
 types = {
     int: "SvStringsSocket",
     float: "SvStringsSocket",
@@ -154,50 +306,85 @@ types = {
     mathutils.Quaternion: "SvQuaternionSocket"
 }
 
+# parsed paths and compiled getters per node, keyed by node_id. this is not stored
+# in the .blend and gets rebuilt lazily the first time a node is processed after loading.
+path_cache = {}
+
 class SvPropNodeMixin():
 
     @property
-    def obj(self):
+    def _cache(self):
+        cache = path_cache.get(self.node_id)
+        if cache is None or cache["prop_name"] != self.prop_name:
+            self.cache_path()
+            cache = path_cache[self.node_id]
+        return cache
+
+    @property
+    def _cached_path(self):
+        return self._cache["path"]
+
+    def cache_path(self):
+        """
+        parse and compile prop_name only when it changes, process() reuses the result
+        returns the current value of the property
+        """
         eval_str = apply_alias(self.prop_name)
-        ast_path = ast.parse(eval_str)
-        path = parse_to_path(ast_path.body[0].value)
-        return get_object(path)
-    
+        path = tokenize_path(eval_str)
+        if path is None:
+            import ast
+            ast_path = ast.parse(eval_str, mode='eval')
+            path = parse_to_path(ast_path.body)
+        path = tuple(path)
+        getter = compile_path(path)
+        obj = getter()
+        cache = {
+            "prop_name": self.prop_name,
+            "path": path,
+            "getter": getter,
+            "setter": make_setter(path, obj),
+            "is_color": is_probably_color(obj, path) is True
+        }
+        path_cache[self.node_id] = cache
+        return obj
+
     def verify_prop(self, context):
         try:
-            obj = self.obj
+            obj = self.cache_path()
         except:
+            import traceback
             traceback.print_exc()
             self.bad_prop = True
             return
 
         self.bad_prop = False
         with self.sv_throttle_tree_update():
-            self.execute_inside_throttle()
+            self.execute_inside_throttle(obj)
         updateNode(self, context)
     
-    def type_assesment(self):
+    def type_assesment(self, item):
         """
         we can use this function to perform more granular attr/type identification
+        item is the current value of the property
         """
-        item = self.obj
         s_type = types.get(type(item))
         if s_type:
             return s_type
 
-        if is_probably_color(item):
+        if is_probably_color(item, self._cached_path):
             return "SvColorSocket"
 
         return None
 
-    def prop_assesment(self):
+    def prop_assesment(self, item):
         p_name = {
             float: "float_prop", 
             int: "int_prop",
             bpy_prop_array: "color_prop"
-        }.get(type(self.obj),"")
+        }.get(type(item),"")
         return p_name
 
+    n_id: StringProperty(default='')
     bad_prop: BoolProperty(default=False)
     prop_name: StringProperty(name='', update=verify_prop)
 
@@ -209,8 +396,8 @@ class SvGetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
     bl_icon = 'FORCE_VORTEX'
     sv_icon = 'SV_PROP_GET'
 
-    def execute_inside_throttle(self):    
-        s_type = self.type_assesment()
+    def execute_inside_throttle(self, obj):
+        s_type = self.type_assesment(obj)
 
         outputs = self.outputs
         if s_type and outputs:
@@ -222,6 +409,13 @@ class SvGetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
         layout.alert = self.bad_prop
         layout.prop(self, "prop_name", text="")
 
+    def sv_copy(self, original):
+        # the copy gets its own path_cache entry
+        self.n_id = ''
+
+    def free(self):
+        path_cache.pop(self.n_id, None)
+
     def process(self):
         """ 
         convert path result to svdata for entering our nodetree 
@@ -229,7 +423,8 @@ class SvGetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
         this is not updated in realtime, when you edit a property on f.ex "modifiers/count"
         requires a refresh of the tree to pick up current state.
         """
-        self.outputs[0].sv_set(wrap_output_data(self.obj))
+        cache = self._cache
+        self.outputs[0].sv_set(wrap_output_data(cache["getter"](), cache["is_color"]))
 
 
 class SvSetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
@@ -249,9 +444,9 @@ class SvSetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
         name="Color", description="Color", size=3,
         min=0.0, max=1.0, subtype='COLOR', update=local_updateNode)
 
-    def execute_inside_throttle(self):
-        s_type = self.type_assesment()
-        p_name = self.prop_assesment()
+    def execute_inside_throttle(self, obj):
+        s_type = self.type_assesment(obj)
+        p_name = self.prop_assesment(obj)
 
         inputs = self.inputs
         if inputs and s_type: 
@@ -266,27 +461,23 @@ class SvSetPropNodeMK2(bpy.types.Node, SverchCustomTreeNode, SvPropNodeMixin):
         layout.alert = self.bad_prop
         layout.prop(self, "prop_name", text="")
 
+    def sv_copy(self, original):
+        # the copy gets its own path_cache entry
+        self.n_id = ''
+
+    def free(self):
+        path_cache.pop(self.n_id, None)
+
     def process(self):
 
         data = self.inputs[0].sv_get()
-        eval_str = apply_alias(self.prop_name)
-        ast_path = ast.parse(eval_str)
-        path = parse_to_path(ast_path.body[0].value)
-        obj = get_object(path)
+        setter = self._cache["setter"]
 
         #with self.sv_throttle_tree_update():
             # changes here should not reflect back into the nodetree?
 
         try:
-            if isinstance(obj, (int, float, bpy_prop_array)):
-                obj = get_object(path[:-1])
-                p_type, value = path[-1]
-                if p_type == "attr":
-                    setattr(obj, value, data[0][0])
-                else: 
-                    obj[value] = data[0][0]
-            else:
-                assign_data(obj, data)
+            setter(data)
 
         except Exception as err:
             print(err)
@@ -0,0 +1,73 @@
+
+import ast
+
+from sverchok.utils.testing import *
+from sverchok.nodes.object_nodes.getsetprop_mk2 import tokenize_path, parse_to_path
+
+class TokenizePathTests(SverchokTestCase):
+
+    def parse_with_ast(self, path_str):
+        return parse_to_path(ast.parse(path_str, mode='eval').body)
+
+    def assert_same_as_ast(self, path_str):
+        with self.subTest(path=path_str):
+            self.assertEqual(tokenize_path(path_str), self.parse_with_ast(path_str))
+
+    def assert_needs_parser(self, path_str):
+        with self.subTest(path=path_str):
+            self.assertIsNone(tokenize_path(path_str))
+
+    def test_attributes_only(self):
+        self.assert_same_as_ast('bpy.context')
+        self.assert_same_as_ast('bpy.context.scene.frame_current')
+        self.assert_same_as_ast('bpy.data.objects.Cube.location')
+        self.assert_same_as_ast('bpy.data._private2')
+
+    def test_quoted_keys(self):
+        self.assert_same_as_ast('bpy.data.objects["Cube"].location')
+        self.assert_same_as_ast("bpy.data.objects['Cube'].location")
+        self.assert_same_as_ast('bpy.data.objects["Cube.001"]')
+        self.assert_same_as_ast('bpy.data.objects["a]b"].location')
+        self.assert_same_as_ast("bpy.data.objects['a]b'].location")
+        self.assert_same_as_ast('bpy.data.objects["it\'s"].location')
+        self.assert_same_as_ast("bpy.data.objects['say \"hi\"'].location")
+        self.assert_same_as_ast('bpy.data.objects[""]')
+
+    def test_int_and_chained_keys(self):
+        self.assert_same_as_ast('bpy.data.objects[0].location')
+        self.assert_same_as_ast('bpy.data.objects["Cube"].modifiers[0].count')
+        self.assert_same_as_ast('bpy.data.objects["Cube"].data.vertices[10].co')
+        self.assert_same_as_ast('bpy.data.objects["Cube"]["prop"]')
+        self.assert_same_as_ast('bpy.data.objects["Cube"].matrix_world[0][1]')
+
+    def test_whitespace_and_escapes(self):
+        self.assert_needs_parser('bpy.data.objects[ "Cube" ]')
+        self.assert_needs_parser('bpy.data.objects ["Cube"]')
+        self.assert_needs_parser('bpy.data. objects')
+        self.assert_needs_parser('bpy.data.objects["Cube"] ')
+        self.assert_needs_parser(r'bpy.data.objects["a\"b"]')
+        self.assert_needs_parser(r"bpy.data.objects['a\'b']")
+        self.assert_needs_parser(r'bpy.data.objects["a\\"]')
+        self.assert_needs_parser('bpy.data.objects[01]')
+
+    def test_keyword_attributes(self):
+        for path_str in ['bpy.data.class', 'bpy.data.objects["Cube"].import', 'bpy.None']:
+            self.assert_needs_parser(path_str)
+            with self.subTest(path=path_str):
+                with self.assertRaises(SyntaxError):
+                    self.parse_with_ast(path_str)
+
+    def test_not_a_path(self):
+        self.assert_needs_parser('bpy.data.objects.get("Cube")')
+        self.assert_needs_parser('bpy.data.objects[-1]')
+        self.assert_needs_parser('bpy..data')
+        self.assert_needs_parser('bpy.data.objects["x"].a\u00b2')
+        self.assert_needs_parser('bpy.data.a\u00b2')
+        self.assert_needs_parser('')
+
+    def test_non_ascii_names(self):
+        # python normalizes these identifiers, f.ex the "fi" ligature becomes "fi"
+        for path_str in ['bpy.data.\ufb01le', 'bpy.data.objects["x"].caf\u00e9']:
+            self.assert_needs_parser(path_str)
+            with self.subTest(path=path_str):
+                self.assertIsNotNone(self.parse_with_ast(path_str))